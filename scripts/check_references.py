@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Script to check the aliases and references of submissions.
+
+All aliases and references are collected in an index that keeps entries in
+memory up to a configurable budget and spills the remainder to a temporary
+SQLite database, so that the memory needed for the index stays bounded
+regardless of the size of the submissions. JSON submissions are read one entity
+at a time and never loaded as a whole; YAML submissions are loaded one file at a
+time. Entities without alias are reported as problems.
+"""
+import sys
+from pathlib import Path
+from typing import Optional
+
+import typer
+from linkml_runtime.utils.schemaview import SchemaView
+
+from script_utils.alias_index import DEFAULT_BATCH_SIZE, AliasIndex, Reference
+from script_utils.cli import echo_failure, echo_success, run
+from script_utils.submission import (
+    EntityKey,
+    get_alias,
+    get_reference_slots,
+    get_submission_slots,
+    iter_references,
+    iter_submission_items,
+)
+
+HERE = Path(__file__).parent.resolve()
+SCHEMA_PATH = HERE.parent / "src" / "schema" / "submission.yaml"
+
+
+def main(
+    submissions: list[Path] = typer.Argument(
+        ..., help="The submission files to check together."
+    ),
+    memory_budget: int = typer.Option(
+        256, help="Memory budget of the in-memory index in MiB."
+    ),
+    batch_size: int = typer.Option(
+        DEFAULT_BATCH_SIZE, help="Number of entries written or looked up at once."
+    ),
+    spill_dir: Optional[Path] = typer.Option(
+        None, help="Directory for the spill database. Defaults to the system temp dir."
+    ),
+):
+    """Check submissions for duplicate aliases and unresolved references."""
+    schema = SchemaView(str(SCHEMA_PATH))
+    submission_slots = get_submission_slots(schema)
+    reference_slots = get_reference_slots(schema)
+
+    with AliasIndex(
+        memory_budget=memory_budget * 1024**2,
+        batch_size=batch_size,
+        spill_dir=spill_dir,
+    ) as index:
+        errors = 0
+        for path in submissions:
+            for slot_name, entity in iter_submission_items(path):
+                cls_name = submission_slots.get(slot_name)
+                if cls_name is None:
+                    continue
+                alias = get_alias(entity)
+                if alias is None:
+                    echo_failure(f"{cls_name} without alias in '{path}'.")
+                    errors += 1
+                    continue
+                key = EntityKey(cls_name, alias)
+                index.add_alias(key)
+                for ref_slot, target in iter_references(key, entity, reference_slots):
+                    index.add_reference(Reference(key, ref_slot, target))
+
+        for key in index.iter_duplicates():
+            echo_failure(f"Duplicate alias '{key.alias}' of class {key.class_name}.")
+            errors += 1
+        for ref in index.iter_unresolved():
+            echo_failure(
+                f"{ref.source.class_name} '{ref.source.alias}' references unknown"
+                + f" {ref.target.class_name} '{ref.target.alias}' in slot"
+                + f" '{ref.slot_name}'."
+            )
+            errors += 1
+        if index.spilled:
+            print("The memory budget was exceeded, the index was spilled to disk.")
+
+    if errors:
+        echo_failure(f"{errors} problem(s) found.")
+        sys.exit(1)
+    echo_success("All aliases are unique and all references resolve.")
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Script to compare two versions of a submission entity by entity.
+
+Entities are identified by their class and alias and compared by a content hash
+that does not depend on key order or on the order of multivalued slots. The
+entities that need to be processed again (added and changed entities as well as
+all entities referencing an added, changed or removed entity) can be written to
+a reduced submission for incremental validation and export.
+"""
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+import typer
+import yaml
+from linkml_runtime.utils.schemaview import SchemaView
+
+from script_utils.cli import echo_failure, echo_success, run
+from script_utils.entity_diff import (
+    diff_submissions,
+    get_affected_entities,
+    hash_submission,
+    subset_submission,
+)
+from script_utils.submission import (
+    get_reference_slots,
+    get_submission_slots,
+    load_submission,
+)
+
+HERE = Path(__file__).parent.resolve()
+SCHEMA_PATH = HERE.parent / "src" / "schema" / "submission.yaml"
+
+
+def main(
+    old: Path = typer.Argument(..., help="The previous version of the submission."),
+    new: Path = typer.Argument(..., help="The new version of the submission."),
+    report: Optional[Path] = typer.Option(
+        None, help="Write the classified entities to this JSON file."
+    ),
+    subset: Optional[Path] = typer.Option(
+        None, help="Write a submission containing only the affected entities."
+    ),
+):
+    """Compare two versions of a submission."""
+    schema = SchemaView(str(SCHEMA_PATH))
+    submission_slots = get_submission_slots(schema)
+    reference_slots = get_reference_slots(schema)
+
+    try:
+        new_submission = load_submission(new)
+        diff = diff_submissions(
+            old_hashes=hash_submission(load_submission(old), submission_slots),
+            new_hashes=hash_submission(new_submission, submission_slots),
+        )
+    except (ValueError, TypeError, yaml.YAMLError) as error:
+        echo_failure(str(error))
+        sys.exit(1)
+    affected = get_affected_entities(
+        diff=diff,
+        submission=new_submission,
+        submission_slots=submission_slots,
+        reference_slots=reference_slots,
+    )
+
+    for category in ["added", "removed", "changed", "unchanged"]:
+        print(f"{category}: {len(getattr(diff, category))}")
+    print(f"affected: {len(affected)}")
+
+    if report:
+        classified = {
+            category: [key._asdict() for key in sorted(getattr(diff, category))]
+            for category in ["added", "removed", "changed", "unchanged"]
+        }
+        classified["affected"] = [key._asdict() for key in sorted(affected)]
+        with open(report, "w", encoding="utf8") as file:
+            json.dump(classified, file, indent=2)
+
+    if subset:
+        with open(subset, "w", encoding="utf8") as file:
+            json.dump(
+                subset_submission(
+                    submission=new_submission,
+                    submission_slots=submission_slots,
+                    reference_slots=reference_slots,
+                    keys=affected,
+                ),
+                file,
+                indent=2,
+                default=str,
+            )
+
+    echo_success("Submissions compared successfully.")
+
+
+if __name__ == "__main__":
+    run(main)
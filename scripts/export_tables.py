@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Script to export the entities of submissions as flat, per-class tables.
+
+The columns of each table follow the induced slots of the class, ordered the
+same way as the columns of the submission spreadsheets. JSON submissions are
+read one entity at a time and their entities are written in chunks, so that at
+most one chunk per class is held in memory. YAML submissions are loaded one file
+at a time.
+"""
+from collections import Counter
+from pathlib import Path
+
+import typer
+import yaml
+from linkml_runtime.utils.schemaview import SchemaView
+
+from script_utils.cli import echo_failure, echo_success, run
+from script_utils.submission import get_submission_slots, iter_submission_items
+from script_utils.tables import TABLE_WRITERS, TableWriter, get_columns
+
+HERE = Path(__file__).parent.resolve()
+SCHEMA_PATH = HERE.parent / "src" / "schema" / "submission.yaml"
+CONF_PATH = HERE.parent / "spreadsheet_conf.yaml"
+
+
+def main(
+    submissions: list[Path] = typer.Argument(..., help="The submission files."),
+    out_dir: Path = typer.Option(..., help="The directory to write the tables to."),
+    table_format: str = typer.Option(
+        "tsv", "--format", help=f"One of: {', '.join(TABLE_WRITERS)}."
+    ),
+    chunk_size: int = typer.Option(10_000, help="Number of rows written at once."),
+):
+    """Export submissions as one table per class."""
+    if table_format not in TABLE_WRITERS:
+        echo_failure(f"Unknown format '{table_format}'.")
+        raise typer.Exit(1)
+
+    # Rows are tagged with the file name of their submission
+    names = Counter(path.name for path in submissions)
+    collisions = sorted(name for name, count in names.items() if count > 1)
+    if collisions:
+        echo_failure(
+            "Submissions with the same file name could not be told apart:"
+            + f" {', '.join(collisions)}."
+        )
+        raise typer.Exit(1)
+
+    with open(CONF_PATH, "r", encoding="utf8") as config_file:
+        slot_order = yaml.safe_load(config_file)["slot_order"]
+
+    schema = SchemaView(str(SCHEMA_PATH))
+    submission_slots = get_submission_slots(schema)
+    classes = set(submission_slots.values())
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    suffix = ".tsv" if table_format == "tsv" else ""
+    writers: dict[str, TableWriter] = {
+        slot_name: TABLE_WRITERS[table_format](
+            out_dir / f"{cls_name}{suffix}",
+            get_columns(schema, slot_order, cls_name, classes),
+        )
+        for slot_name, cls_name in submission_slots.items()
+    }
+    try:
+        for path in submissions:
+            chunks: dict[str, list] = {slot_name: [] for slot_name in writers}
+            for slot_name, entity in iter_submission_items(path):
+                chunk = chunks.get(slot_name)
+                if chunk is None:
+                    continue
+                chunk.append(entity)
+                if len(chunk) >= chunk_size:
+                    writers[slot_name].write(path.name, chunk)
+                    chunk.clear()
+            for slot_name, chunk in chunks.items():
+                if chunk:
+                    writers[slot_name].write(path.name, chunk)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    echo_success(f"Tables written to {out_dir}.")
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Script to export submissions to prefilled XLSX workbooks.
+
+The workbooks share the layout of the spreadsheet templates generated by
+generate_xlsx.py: the same worksheets, header rows and styles, and the hidden
+`__properties` sheet holding the model version. Each worksheet contains one row
+per entity of the submission. Workbooks are written in write-only mode and
+submissions are processed in parallel.
+"""
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+import typer
+from linkml_runtime.utils.schemaview import SchemaView
+from openpyxl import Workbook
+
+from generate_xlsx import (
+    CONF_PATH,
+    SCHEMA_PATH,
+    SheetLayout,
+    add_properties_sheet,
+    create_worksheet,
+    get_content_fill,
+    get_sheet_layouts,
+    load_config,
+    make_value_cell,
+)
+from script_utils.cli import echo_failure, echo_success, run
+from script_utils.schema import get_ghga_schema_version
+from script_utils.submission import get_submission_slots, load_submission
+from script_utils.workbook import encode_cell_value
+
+
+def export_workbook(
+    submission: dict[str, Any],
+    layouts: list[SheetLayout],
+    sheet_slots: dict[str, str],
+    version: str,
+    out_path: Path,
+) -> list[str]:
+    """Writes the entities of a submission to a workbook with the given
+    layout. Returns warnings about slots of entities that are not part of the
+    layout and therefore not exported."""
+    warnings = []
+    wb = Workbook(write_only=True)
+    for layout in layouts:
+        ws, rows = create_worksheet(wb, layout)
+        for row in rows:
+            ws.append(row)
+        fill_content = get_content_fill(layout)
+        column_names = {column.name for column in layout.columns}
+        for entity in submission.get(sheet_slots[layout.name]) or []:
+            unknown = entity.keys() - column_names
+            if unknown:
+                warnings.append(
+                    f"{layout.name} '{entity.get('alias')}' has slots that are not"
+                    + f" exported: {', '.join(sorted(unknown))}"
+                )
+            row = []
+            for column in layout.columns:
+                cell = make_value_cell(ws, fill_content)
+                try:
+                    cell.value = encode_cell_value(entity.get(column.name))
+                except ValueError as error:
+                    raise ValueError(
+                        f"{layout.name} '{entity.get('alias')}', slot"
+                        + f" '{column.name}': {error}"
+                    ) from error
+                if isinstance(cell.value, str):
+                    # Keep values such as "=1+1" as text instead of formulas
+                    cell.data_type = "s"
+                row.append(cell)
+            ws.append(row)
+    add_properties_sheet(wb, version)
+    wb.save(out_path)
+    return warnings
+
+
+def export_submission(
+    submission_path: Path,
+    workbooks: list[tuple[str, list[SheetLayout]]],
+    sheet_slots: dict[str, str],
+    version: str,
+    out_dir: Path,
+) -> list[str]:
+    """Exports a single submission to all configured workbooks and returns the
+    warnings of all workbooks"""
+    submission = load_submission(submission_path)
+    warnings: dict[str, None] = {}
+    for file_name, layouts in workbooks:
+        workbook_warnings = export_workbook(
+            submission=submission,
+            layouts=layouts,
+            sheet_slots=sheet_slots,
+            version=version,
+            out_path=out_dir / f"{submission_path.stem}_{file_name}",
+        )
+        warnings.update(dict.fromkeys(workbook_warnings))
+    return list(warnings)
+
+
+def main(
+    submissions: list[Path] = typer.Argument(..., help="The submission files."),
+    out_dir: Path = typer.Option(..., help="The directory to write workbooks to."),
+    config_path: Path = typer.Option(CONF_PATH, "--config", help="The XLSX config."),
+    workers: Optional[int] = typer.Option(
+        None, help="Number of worker processes. Defaults to the number of CPUs."
+    ),
+):
+    """Export submissions to prefilled XLSX workbooks."""
+    stems = Counter(path.stem for path in submissions)
+    collisions = sorted(stem for stem, count in stems.items() if count > 1)
+    if collisions:
+        echo_failure(
+            "Submissions with the same file name would overwrite each other's"
+            + f" workbooks: {', '.join(collisions)}."
+        )
+        sys.exit(1)
+
+    config = load_config(config_path)
+    schema = SchemaView(str(SCHEMA_PATH))
+    sheet_slots = {
+        cls_name: slot_name
+        for slot_name, cls_name in get_submission_slots(schema).items()
+    }
+    workbooks = [
+        (wb_config.file_name, get_sheet_layouts(schema, config, wb_config))
+        for wb_config in config.workbooks
+    ]
+    version = get_ghga_schema_version(schema)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(
+                export_submission,
+                submission_path=path,
+                workbooks=workbooks,
+                sheet_slots=sheet_slots,
+                version=version,
+                out_dir=out_dir,
+            )
+            for path in submissions
+        ]
+        failed = 0
+        for path, future in zip(submissions, futures):
+            try:
+                warnings = future.result()
+            except ValueError as error:
+                echo_failure(f"{path.name} - {error}")
+                failed += 1
+            else:
+                for warning in warnings:
+                    print(f"{path.name} - warning: {warning}")
+                print(f"{path.name} - done.", flush=True)
+
+    if failed:
+        echo_failure(f"{failed} submission(s) could not be exported.")
+        sys.exit(1)
+    echo_success(f"Workbooks written to {out_dir}.")
+
+
+if __name__ == "__main__":
+    run(main)
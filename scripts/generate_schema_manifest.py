@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Script to generate the schema manifest.
+
+The manifest is a compact JSON representation of the classes, induced slots,
+enums and types of the schema that can be read with `script_utils.manifest`
+without depending on LinkML.
+"""
+import difflib
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from linkml_runtime.utils.schemaview import SchemaView
+
+from script_utils.cli import echo_failure, echo_success, run
+from script_utils.manifest import MANIFEST_VERSION
+from script_utils.schema import get_ghga_schema_version
+
+HERE = Path(__file__).parent.resolve()
+SCHEMA_PATH = HERE.parent / "src" / "schema" / "submission.yaml"
+MANIFEST_PATH = HERE.parent / "src" / "schema" / "submission.manifest.json"
+
+
+def build_manifest(schema: SchemaView) -> dict[str, Any]:
+    """Builds the manifest for the given schema"""
+    classes = {}
+    tree_root = None
+    for cls_name, cls_def in schema.all_classes().items():
+        if cls_def.tree_root:
+            tree_root = cls_name
+        classes[cls_name] = {
+            "ancestors": schema.class_ancestors(cls_name),
+            "slots": [
+                {
+                    "name": slot.name,
+                    "range": str(slot.range) if slot.range else "string",
+                    "multivalued": bool(slot.multivalued),
+                    "required": bool(slot.required),
+                    "recommended": bool(slot.recommended),
+                    "identifier": bool(slot.identifier),
+                    "inlined": bool(slot.inlined),
+                }
+                for slot in schema.class_induced_slots(cls_name)
+            ],
+        }
+    if tree_root is None:
+        raise RuntimeError("Unable to identify the tree root of the schema.")
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "schema_name": schema.schema.name,
+        "schema_version": get_ghga_schema_version(schema),
+        "tree_root": tree_root,
+        "types": list(schema.all_types()),
+        "enums": {
+            enum_name: list(enum_def.permissible_values)
+            for enum_name, enum_def in schema.all_enums().items()
+        },
+        "classes": classes,
+    }
+
+
+def serialize_manifest(manifest: dict[str, Any]) -> str:
+    """Serializes the manifest to JSON"""
+    return json.dumps(manifest, indent=2) + "\n"
+
+
+def main(check: bool = False):
+    """Update or check the schema manifest."""
+    expected = serialize_manifest(build_manifest(SchemaView(str(SCHEMA_PATH))))
+
+    if check:
+        with open(MANIFEST_PATH, "r", encoding="utf8") as file:
+            observed = file.read()
+        if expected == observed:
+            echo_success("Schema manifest is up to date.")
+            return
+        for line in difflib.unified_diff(
+            observed.splitlines(keepends=True),
+            expected.splitlines(keepends=True),
+            fromfile="observed",
+            tofile="expected",
+        ):
+            print("   ", line.rstrip())
+        echo_failure("Schema manifest is not up to date.")
+        sys.exit(1)
+
+    with open(MANIFEST_PATH, "w", encoding="utf8") as file:
+        file.write(expected)
+    echo_success("Successfully updated the schema manifest.")
+
+
+if __name__ == "__main__":
+    run(main)
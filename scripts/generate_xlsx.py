@@ -7,7 +7,7 @@ from pathlib import Path
 from sys import stderr
 import sys
 from tempfile import TemporaryDirectory
-from typing import Generator, Optional
+from typing import Generator, NamedTuple, Optional
 from linkml_runtime.utils.schemaview import SchemaView
 from linkml_runtime.linkml_model.meta import SlotDefinition
 from openpyxl import Workbook, load_workbook
@@ -18,6 +18,8 @@ from openpyxl.utils import get_column_letter
 from pydantic import BaseModel, root_validator
 import yaml
 from script_utils.cli import echo_failure, echo_success, run
+from script_utils.schema import get_ghga_schema_version, get_ordered_slots
+from script_utils.workbook import HEADER_ROWS
 
 HERE = Path(__file__).parent.resolve()
 SCHEMA_PATH = HERE.parent / "src" / "schema" / "submission.yaml"
@@ -58,17 +60,6 @@ class Config(BaseModel):
         return values
 
 
-def _get_ghga_schema_version(schema: SchemaView) -> str:
-    schema_def = [
-        sdef
-        for sdef in schema.all_schema()
-        if sdef.name == "GHGA-Submission-Metadata-Schema"
-    ]
-    if len(schema_def) != 1 or schema_def[0].version is None:
-        raise RuntimeError("Unable to identify GHGA Model version.")
-    return schema_def[0].version
-
-
 THIN_BORDER = Border(
     left=Side(border_style=BORDER_THIN, color="00000000"),
     right=Side(border_style=BORDER_THIN, color="00000000"),
@@ -160,7 +151,7 @@ class ColumnMeta:
         self.type_name = str(self.range) if self.range in schema.all_types() else None
 
 
-def _make_value_cell(ws, fill_content):
+def make_value_cell(ws, fill_content):
     """Creates a new cell for the value area of the worksheet"""
     value_cell = Cell(ws)
     if fill_content:
@@ -169,48 +160,130 @@ def _make_value_cell(ws, fill_content):
     return value_cell
 
 
-def _get_ordered_slots(
-    schema: SchemaView,
-    slot_order: list[str],
-    cls_name: str,
-    wb_classes: set[str],
-) -> list[SlotDefinition]:
-    """Given a class, generates a list of slots that must be rendered. Slots
-    that are listed in the slot_order config parameter are at the top of the
-    list in their respective order. Slots that are referencing other classes
-    which are not part of this workbook are omitted."""
-    slots = schema.class_induced_slots(cls_name)
-    slot_names = {slot.name: idx for idx, slot in enumerate(slots)}
-    ordered = [
-        slots[slot_names[slot_name]]
-        for slot_name in slot_order
-        if slot_name in slot_names
-    ]
-    unordered = [slot for slot in slots if slot.name not in slot_order]
-    all_slots = ordered + unordered
-    # We ignore slots which have a class range when the target class is not included in this workbook.
-    ignored_slots = [
-        slot
-        for slot in all_slots
-        if slot.range in schema.all_classes()
-        and slot.range not in wb_classes
-        and schema.get_identifier_slot(slot.range)
-    ]
-    # If one of those is mandatory, we raise an error
-    for ignored_slot in ignored_slots:
-        if ignored_slot.required:
-            raise RuntimeError(
-                f"Slot '{cls_name}.{ignored_slot.name}' is mandatory, but target class is not included in the workbook!"
+class SheetColumn(NamedTuple):
+    """A column of a worksheet"""
+
+    name: str
+    multivalued: bool
+    header: list[str]
+
+
+class SheetLayout(NamedTuple):
+    """The columns and styles of a worksheet. Unlike ColumnMeta, a layout does
+    not refer to the schema and can be passed to other processes."""
+
+    name: str
+    columns: list[SheetColumn]
+    header_color: Optional[str]
+    content_color: Optional[str]
+
+
+def get_sheet_layouts(
+    schema: SchemaView, config: Config, wb_config: WorkbookConfig
+) -> list[SheetLayout]:
+    """Generates the layouts of all worksheets of the configured workbook"""
+    # All classes configured in this workbook
+    wb_classes = set(wb_config.worksheets)
+    layouts = []
+    for ws_name in wb_config.worksheets:
+        col_metas = [
+            ColumnMeta(schema, slot_def, wb_classes)
+            for slot_def in get_ordered_slots(
+                schema=schema,
+                slot_order=config.slot_order,
+                cls_name=ws_name,
+                wb_classes=wb_classes,
             )
-    slots = [slot for slot in all_slots if slot not in ignored_slots]
-    return slots
+        ]
+        columns = [
+            SheetColumn(
+                name=col_meta.name,
+                multivalued=bool(col_meta.slot_def.multivalued),
+                header=[
+                    col_meta.name,
+                    col_meta.description,
+                    col_meta.type_help,
+                    col_meta.mv_help,
+                    col_meta.restriction_help,
+                    col_meta.required_help,
+                ],
+            )
+            for col_meta in col_metas
+        ]
+        layouts.append(
+            SheetLayout(
+                name=ws_name,
+                columns=columns,
+                header_color=config.styles[ws_name].header_color,
+                content_color=config.styles[ws_name].content_color,
+            )
+        )
+    return layouts
+
+
+def create_worksheet(wb: Workbook, layout: SheetLayout):
+    """Creates and formats a worksheet and returns it together with its
+    formatted header rows. The rows are not yet appended to the worksheet."""
+    ws = wb.create_sheet(layout.name)
+
+    # Generate the header rows
+    rows = [
+        [Cell(ws, value=column.header[row_idx]) for column in layout.columns]
+        for row_idx in range(HEADER_ROWS)
+    ]
+
+    # Format the header rows
+    font_bold = Font(bold=True)
+
+    fill_header = (
+        PatternFill("solid", fgColor=layout.header_color)
+        if layout.header_color
+        else None
+    )
+    for cell in rows[0]:
+        cell.font = font_bold
+    for row in rows:
+        for cell in row:
+            cell.alignment = ALIGN_HEADER
+            if fill_header:
+                cell.fill = fill_header
+            cell.border = THIN_BORDER
+
+    # Format the sheet tab color
+    if layout.header_color:
+        ws.sheet_properties.tabColor = layout.header_color
+
+    # Format column width
+    for column in range(1, len(layout.columns) + 1):
+        ws.column_dimensions[get_column_letter(column)].width = 35
+
+    return ws, rows
+
+
+def get_content_fill(layout: SheetLayout) -> Optional[PatternFill]:
+    """Returns the fill of the value fields of a worksheet"""
+    if layout.content_color:
+        return PatternFill("solid", fgColor=layout.content_color)
+    return None
+
+
+def add_properties_sheet(wb: Workbook, version: str):
+    """Encodes the metadata model version in the workbook"""
+    ws = wb.create_sheet("__properties")
+    ws.sheet_state = "hidden"
+    ws.append([version])
+
+
+def load_config(config_path: Path) -> Config:
+    """Loads the XLSX generator config"""
+    with open(config_path, "r", encoding="utf8") as config_file:
+        return Config.parse_obj(yaml.safe_load(config_file))
 
 
 def create_xlsx_files(config_path: Path, out_dir: Path):
     """Creates the XLSX workbooks as configured in the provided configuration
     and writes them to the specified output path"""
-    with open(config_path, "r", encoding="utf8") as config_file:
-        config = Config.parse_obj(yaml.safe_load(config_file))
+    config = load_config(config_path)
 
     # Read schema
     schema = SchemaView(str(SCHEMA_PATH))
@@ -222,78 +295,24 @@ def create_xlsx_files(config_path: Path, out_dir: Path):
         wb = Workbook()
         # Remove the default worksheet
         wb.remove(wb.worksheets[0])
-        # All classes configured in this workbook
-        wb_classes = set(wb_config.worksheets)
         # Add worksheets as specified in config
-        for ws_name in wb_config.worksheets:
-            ws = wb.create_sheet(ws_name)
-            col_metas = [
-                ColumnMeta(schema, slot_def, wb_classes)
-                for slot_def in _get_ordered_slots(
-                    schema=schema,
-                    slot_order=config.slot_order,
-                    cls_name=ws_name,
-                    wb_classes=wb_classes,
-                )
-            ]
-
-            # Generate the header rows
-            rows = []
-            rows.append([Cell(ws, value=col_meta.name) for col_meta in col_metas])
-            rows.append(
-                [Cell(ws, value=col_meta.description) for col_meta in col_metas]
-            )
-            rows.append([Cell(ws, value=col_meta.type_help) for col_meta in col_metas])
-            rows.append([Cell(ws, value=col_meta.mv_help) for col_meta in col_metas])
-            rows.append(
-                [Cell(ws, value=col_meta.restriction_help) for col_meta in col_metas]
-            )
-            rows.append(
-                [Cell(ws, value=col_meta.required_help) for col_meta in col_metas]
-            )
-
-            # Format the header rows
-            font_bold = Font(bold=True)
-
-            header_color = config.styles[ws_name].header_color
-            fill_header = (
-                PatternFill("solid", fgColor=header_color) if header_color else None
-            )
-            for cell in rows[0]:
-                cell.font = font_bold
-            for row in rows:
-                for cell in row:
-                    cell.alignment = ALIGN_HEADER
-                    if fill_header:
-                        cell.fill = fill_header
-                    cell.border = THIN_BORDER
-
-            # Format the sheet tab color
-            if header_color:
-                ws.sheet_properties.tabColor = header_color
+        for layout in get_sheet_layouts(schema, config, wb_config):
+            ws, rows = create_worksheet(wb, layout)
 
             # Color the value fields
-            content_color = config.styles[ws_name].content_color
-            fill_content = (
-                PatternFill("solid", fgColor=content_color) if content_color else None
-            )
-
+            fill_content = get_content_fill(layout)
             for _ in range(1000):
                 rows.append(
-                    [_make_value_cell(ws, fill_content) for _ in range(len(col_metas))]
+                    [
+                        make_value_cell(ws, fill_content)
+                        for _ in range(len(layout.columns))
+                    ]
                 )
 
             for row in rows:
                 ws.append(row)
 
-            # Format column width
-            for column in range(1, ws.max_column + 1):
-                ws.column_dimensions[get_column_letter(column)].width = 35
-
-        # Encode metadata model version in the workbook
-        ws = wb.create_sheet("__properties")
-        ws.sheet_state = "hidden"
-        ws.cell(row=1, column=1, value=_get_ghga_schema_version(schema))
+        add_properties_sheet(wb, get_ghga_schema_version(schema))
 
         # Save to file name specified in config
         wb.save(out_dir / wb_config.file_name)
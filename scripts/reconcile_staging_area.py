@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Script to reconcile the File entities of a submission with a staging area.
+
+The staging directory is walked with parallel scandir workers and all files are
+indexed by their file name. The index is matched against the names of all
+File-derived entities of the submission to report missing files, undeclared
+extra files and duplicate names. Unreadable directories and File entities
+without name are reported as well. Optionally, sizes and checksums of the
+matched files are collected in a thread pool.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+import typer
+import yaml
+from linkml_runtime.utils.schemaview import SchemaView
+
+from script_utils.cli import echo_failure, echo_success, run
+from script_utils.staging import (
+    collect_file_info,
+    get_file_slots,
+    reconcile,
+    scan_staging_area,
+)
+from script_utils.submission import (
+    MissingAliasError,
+    get_submission_slots,
+    load_submission,
+)
+
+HERE = Path(__file__).parent.resolve()
+SCHEMA_PATH = HERE.parent / "src" / "schema" / "submission.yaml"
+
+
+def main(
+    submission: Path = typer.Argument(..., help="The submission file."),
+    staging_dir: Path = typer.Argument(..., help="The staging directory."),
+    workers: int = typer.Option(
+        min(32, (os.cpu_count() or 1) + 4), help="Number of worker threads."
+    ),
+    sizes: bool = typer.Option(False, help="Collect the sizes of all matched files."),
+    checksums: bool = typer.Option(
+        False, help="Compute checksums of all matched files."
+    ),
+    algorithm: str = typer.Option("sha256", help="The checksum algorithm."),
+    report: Optional[Path] = typer.Option(
+        None, help="Write the reconciliation report to this JSON file."
+    ),
+):
+    """Reconcile the File entities of a submission with a staging directory."""
+    schema = SchemaView(str(SCHEMA_PATH))
+    file_slots = get_file_slots(schema, get_submission_slots(schema))
+
+    if not staging_dir.is_dir():
+        echo_failure(f"Staging directory '{staging_dir}' does not exist.")
+        sys.exit(1)
+    index = scan_staging_area(staging_dir, workers=workers)
+    try:
+        result = reconcile(load_submission(submission), file_slots, index)
+    except (ValueError, yaml.YAMLError) as error:
+        echo_failure(str(error))
+        sys.exit(1)
+
+    for unreadable in result.unreadable:
+        echo_failure(f"Unreadable directory {unreadable}")
+    for key in result.unnamed:
+        echo_failure(f"{key.class_name} '{key.alias}' has no file name.")
+    for key in result.missing:
+        echo_failure(f"Missing file for {key.class_name} '{key.alias}'.")
+    for name, paths in result.duplicate_staged.items():
+        echo_failure(f"File name '{name}' is staged more than once: {paths}")
+    for name, keys in result.duplicate_declared.items():
+        aliases = [key.alias for key in keys]
+        echo_failure(f"File name '{name}' is declared more than once: {aliases}")
+    for path in result.extra:
+        print(f"Undeclared file: {path}")
+
+    files: dict[str, dict[str, Any]] = {}
+    if sizes or checksums:
+        extra = set(result.extra)
+        matched = [
+            path
+            for paths in index.files.values()
+            for path in paths
+            if path not in extra
+        ]
+        files = collect_file_info(
+            matched,
+            sizes=sizes,
+            algorithm=algorithm if checksums else None,
+            workers=workers,
+        )
+    unreadable_files = [path for path, info in files.items() if "error" in info]
+    for path in unreadable_files:
+        echo_failure(f"Unable to read file {path}: {files[path]['error']}")
+
+    if report:
+        with open(report, "w", encoding="utf8") as file:
+            output = result.dict()
+            output["missing"] = [key._asdict() for key in result.missing]
+            output["unnamed"] = [key._asdict() for key in result.unnamed]
+            output["duplicate_declared"] = {
+                name: [key._asdict() for key in keys]
+                for name, keys in result.duplicate_declared.items()
+            }
+            output["files"] = files
+            json.dump(output, file, indent=2)
+
+    if not result.ok or unreadable_files:
+        echo_failure("The staging area does not match the submission.")
+        sys.exit(1)
+    echo_success("The staging area matches the submission.")
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,245 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""An index of entity aliases and references with a bounded memory footprint"""
+
+import sqlite3
+import sys
+from itertools import islice
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from script_utils.submission import EntityKey
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024**2
+DEFAULT_BATCH_SIZE = 10_000
+
+# Rough per-entry overhead of the in-memory containers, on top of the strings
+ENTRY_OVERHEAD = 120
+
+
+class Reference(NamedTuple):
+    """A reference from one entity to another one via the given slot"""
+
+    source: EntityKey
+    slot_name: str
+    target: EntityKey
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Splits an iterable into lists of at most the given size"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class AliasIndex:
+    """Collects the aliases of all entities of a submission and the references
+    between them in order to detect duplicate aliases and dangling references.
+
+    Entries are kept in memory until their estimated size exceeds the memory
+    budget. All further entries are spilled to an SQLite database in a temporary
+    directory, which is written and queried in batches."""
+
+    def __init__(
+        self,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        spill_dir: Optional[Path] = None,
+    ):
+        """Creates a new, empty AliasIndex"""
+        self.memory_budget = memory_budget
+        self.batch_size = batch_size
+        self.spill_dir = spill_dir
+        self.memory_usage = 0
+        self._aliases: set[EntityKey] = set()
+        self._references: list[Reference] = []
+        self._duplicates: set[EntityKey] = set()
+        self._pending_aliases: list[EntityKey] = []
+        self._pending_references: list[Reference] = []
+        self._tmp_dir: Optional[TemporaryDirectory] = None
+        self._db: Optional[sqlite3.Connection] = None
+
+    def __enter__(self) -> "AliasIndex":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def spilled(self) -> bool:
+        """Whether or not the memory budget was exceeded"""
+        return self._db is not None
+
+    def close(self):
+        """Closes and removes the spill database, if any"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
+
+    def _spill(self):
+        """Creates the spill database"""
+        # pylint: disable=consider-using-with
+        self._tmp_dir = TemporaryDirectory(dir=self.spill_dir)
+        self._db = sqlite3.connect(Path(self._tmp_dir.name) / "alias_index.sqlite")
+        self._db.executescript(
+            """
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE aliases (
+                class_name TEXT NOT NULL,
+                alias TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (class_name, alias)
+            ) WITHOUT ROWID;
+            CREATE TABLE refs (
+                source_class TEXT NOT NULL,
+                source_alias TEXT NOT NULL,
+                slot_name TEXT NOT NULL,
+                target_class TEXT NOT NULL,
+                target_alias TEXT NOT NULL
+            );
+            CREATE TEMPORARY TABLE lookup (
+                class_name TEXT NOT NULL,
+                alias TEXT NOT NULL
+            );
+            """
+        )
+
+    def _reserve(self, *values: str) -> bool:
+        """Accounts for a new entry and returns whether it fits into memory"""
+        if self.spilled:
+            return False
+        size = ENTRY_OVERHEAD + sum(sys.getsizeof(value) for value in values)
+        if self.memory_usage + size > self.memory_budget:
+            self._spill()
+            return False
+        self.memory_usage += size
+        return True
+
+    def add_alias(self, key: EntityKey):
+        """Adds the alias of an entity to the index"""
+        if key in self._aliases:
+            self._duplicates.add(key)
+        elif self._reserve(*key):
+            self._aliases.add(key)
+        else:
+            self._pending_aliases.append(key)
+            if len(self._pending_aliases) >= self.batch_size:
+                self._flush_aliases()
+
+    def add_reference(self, reference: Reference):
+        """Adds a reference between two entities to the index"""
+        if self._reserve(reference.slot_name, *reference.source, *reference.target):
+            self._references.append(reference)
+        else:
+            self._pending_references.append(reference)
+            if len(self._pending_references) >= self.batch_size:
+                self._flush_references()
+
+    def _flush_aliases(self):
+        """Writes all pending aliases to the spill database"""
+        if self._db is None or not self._pending_aliases:
+            return
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO aliases VALUES (?, ?, 1)"
+                + " ON CONFLICT (class_name, alias) DO UPDATE SET count = count + 1",
+                self._pending_aliases,
+            )
+        self._pending_aliases.clear()
+
+    def _flush_references(self):
+        """Writes all pending references to the spill database"""
+        if self._db is None or not self._pending_references:
+            return
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO refs VALUES (?, ?, ?, ?, ?)",
+                (
+                    (*ref.source, ref.slot_name, *ref.target)
+                    for ref in self._pending_references
+                ),
+            )
+        self._pending_references.clear()
+
+    def flush(self):
+        """Writes all pending entries to the spill database"""
+        self._flush_aliases()
+        self._flush_references()
+
+    def contains_many(self, keys: Iterable[EntityKey]) -> set[EntityKey]:
+        """Returns those of the given keys that are part of the index. Keys
+        that are not held in memory are looked up in batches."""
+        found = set()
+        missing = []
+        for key in keys:
+            if key in self._aliases:
+                found.add(key)
+            else:
+                missing.append(key)
+        if self._db is None or not missing:
+            return found
+        self._flush_aliases()
+        for batch in _batched(missing, self.batch_size):
+            with self._db:
+                self._db.executemany("INSERT INTO lookup VALUES (?, ?)", batch)
+                rows = self._db.execute(
+                    """
+                    SELECT l.class_name, l.alias FROM lookup l JOIN aliases a
+                        ON a.class_name = l.class_name AND a.alias = l.alias
+                    """
+                ).fetchall()
+                self._db.execute("DELETE FROM lookup")
+            found.update(EntityKey(*row) for row in rows)
+        return found
+
+    def iter_duplicates(self) -> Iterator[EntityKey]:
+        """Iterates over all aliases that were added more than once"""
+        yield from self._duplicates
+        if self._db is None:
+            return
+        self._flush_aliases()
+        rows = self._db.execute("SELECT class_name, alias FROM aliases WHERE count > 1")
+        yield from (EntityKey(*row) for row in rows)
+
+    def iter_unresolved(self) -> Iterator[Reference]:
+        """Iterates over all references whose target is not part of the index"""
+        for batch in _batched(self._references, self.batch_size):
+            found = self.contains_many(ref.target for ref in batch)
+            yield from (ref for ref in batch if ref.target not in found)
+        if self._db is None:
+            return
+        self.flush()
+        rows = self._db.execute(
+            """
+            SELECT r.source_class, r.source_alias, r.slot_name,
+                r.target_class, r.target_alias
+            FROM refs r LEFT JOIN aliases a
+                ON a.class_name = r.target_class AND a.alias = r.target_alias
+            WHERE a.alias IS NULL
+            """
+        )
+        for source_class, source_alias, slot_name, target_class, target_alias in rows:
+            target = EntityKey(target_class, target_alias)
+            if target not in self._aliases:
+                yield Reference(
+                    EntityKey(source_class, source_alias), slot_name, target
+                )
@@ -0,0 +1,202 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Content hashing of submission entities and differences between submissions"""
+
+import hashlib
+import json
+from datetime import date
+from typing import Any
+
+from pydantic import BaseModel
+
+from script_utils.submission import EntityKey, iter_entities, iter_references
+
+
+class DuplicateAliasError(ValueError):
+    """Raised when two entities of the same class share an alias"""
+
+
+class SubmissionDiff(BaseModel):
+    """The entities of two submission versions, classified by their changes"""
+
+    added: set[EntityKey] = set()
+    removed: set[EntityKey] = set()
+    changed: set[EntityKey] = set()
+    unchanged: set[EntityKey] = set()
+
+    @property
+    def modified(self) -> set[EntityKey]:
+        """All entities of the new submission that differ from the old one"""
+        return self.added | self.changed
+
+
+def _canonicalize(value: Any) -> Any:
+    """Returns a canonical form of a JSON value. Empty values are dropped and
+    lists are sorted, as neither key order nor the order of multivalued slots
+    carries meaning in a submission. Dates, as loaded from unquoted YAML
+    scalars, are converted to ISO 8601 strings."""
+    if isinstance(value, dict):
+        return {
+            key: _canonicalize(val)
+            for key, val in value.items()
+            if val is not None and val != [] and val != {}
+        }
+    if isinstance(value, list):
+        return sorted(
+            (_canonicalize(item) for item in value),
+            key=lambda item: json.dumps(item, sort_keys=True, default=str),
+        )
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def hash_entity(entity: dict[str, Any]) -> str:
+    """Computes the content hash of a single entity"""
+    encoded = json.dumps(
+        _canonicalize(entity),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(encoded.encode("utf8")).hexdigest()
+
+
+def hash_submission(
+    submission: dict[str, Any], submission_slots: dict[str, str]
+) -> dict[EntityKey, str]:
+    """Computes the content hashes of all entities of a submission"""
+    hashes: dict[EntityKey, str] = {}
+    for key, entity in iter_entities(submission, submission_slots):
+        if key in hashes:
+            raise DuplicateAliasError(
+                f"Alias '{key.alias}' is used by more than one {key.class_name}."
+            )
+        hashes[key] = hash_entity(entity)
+    return hashes
+
+
+def diff_submissions(
+    old_hashes: dict[EntityKey, str], new_hashes: dict[EntityKey, str]
+) -> SubmissionDiff:
+    """Classifies the entities of two submission versions by comparing their
+    content hashes"""
+    diff = SubmissionDiff()
+    for key, new_hash in new_hashes.items():
+        old_hash = old_hashes.get(key)
+        if old_hash is None:
+            diff.added.add(key)
+        elif old_hash == new_hash:
+            diff.unchanged.add(key)
+        else:
+            diff.changed.add(key)
+    diff.removed = old_hashes.keys() - new_hashes.keys()
+    return diff
+
+
+def get_referencing_entities(
+    submission: dict[str, Any],
+    submission_slots: dict[str, str],
+    reference_slots: dict[str, dict[str, str]],
+    targets: set[EntityKey],
+) -> set[EntityKey]:
+    """Returns the entities of a submission that reference any of the
+    specified target entities."""
+    return {
+        key
+        for key, entity in iter_entities(submission, submission_slots)
+        if any(
+            target in targets
+            for _, target in iter_references(key, entity, reference_slots)
+        )
+    }
+
+
+def get_affected_entities(
+    diff: SubmissionDiff,
+    submission: dict[str, Any],
+    submission_slots: dict[str, str],
+    reference_slots: dict[str, dict[str, str]],
+) -> set[EntityKey]:
+    """Returns the entities of the new submission that need to be processed
+    again: all added and changed entities, plus all entities referencing an
+    added, changed or removed entity."""
+    referencing = get_referencing_entities(
+        submission=submission,
+        submission_slots=submission_slots,
+        reference_slots=reference_slots,
+        targets=diff.modified | diff.removed,
+    )
+    return diff.modified | referencing
+
+
+def subset_submission(
+    submission: dict[str, Any],
+    submission_slots: dict[str, str],
+    reference_slots: dict[str, dict[str, str]],
+    keys: set[EntityKey],
+) -> dict[str, Any]:
+    """Creates a submission that only contains the specified entities and all
+    entities they reference, directly or indirectly, so that references within
+    the subset resolve.
+
+    >>> subset = subset_submission(
+    ...     submission={
+    ...         "experiments": [{"alias": "E1", "sample": "S1"}],
+    ...         "samples": [
+    ...             {"alias": "S1", "individual": "I1"},
+    ...             {"alias": "S2", "individual": "I2"},
+    ...         ],
+    ...         "individuals": [{"alias": "I1"}, {"alias": "I2"}],
+    ...     },
+    ...     submission_slots={
+    ...         "experiments": "Experiment",
+    ...         "samples": "Sample",
+    ...         "individuals": "Individual",
+    ...     },
+    ...     reference_slots={
+    ...         "Experiment": {"sample": "Sample"},
+    ...         "Sample": {"individual": "Individual"},
+    ...         "Individual": {},
+    ...     },
+    ...     keys={EntityKey("Experiment", "E1")},
+    ... )
+    >>> [entity["alias"] for entity in subset["individuals"]]
+    ['I1']
+    """
+    entities = dict(iter_entities(submission, submission_slots))
+    included: set[EntityKey] = set()
+    pending = list(keys)
+    while pending:
+        key = pending.pop()
+        if key in included:
+            continue
+        included.add(key)
+        entity = entities.get(key)
+        if entity is not None:
+            pending.extend(
+                target for _, target in iter_references(key, entity, reference_slots)
+            )
+    return {
+        slot_name: [
+            entity
+            for key, entity in iter_entities(submission, {slot_name: cls_name})
+            if key in included
+        ]
+        for slot_name, cls_name in submission_slots.items()
+    }
@@ -0,0 +1,134 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""A lightweight reader for the schema manifest.
+
+The schema manifest is a JSON file generated from the LinkML schema by
+`scripts/generate_schema_manifest.py`. It contains the classes with their
+induced slots, the enums and the types of the schema. This module only depends
+on the standard library, so that services that only need to look up these
+properties can do so without loading the LinkML schema.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+MANIFEST_VERSION = 1
+
+
+class SlotInfo(NamedTuple):
+    """The properties of a slot as induced for a particular class"""
+
+    name: str
+    range: str
+    multivalued: bool
+    required: bool
+    recommended: bool
+    identifier: bool
+    inlined: bool
+
+
+class SchemaManifest:
+    """Provides lookups into the schema manifest"""
+
+    def __init__(self, manifest: dict[str, Any]):
+        """Creates a new SchemaManifest from the decoded manifest"""
+        if manifest.get("manifest_version") != MANIFEST_VERSION:
+            raise ValueError(
+                f"Unsupported manifest version: {manifest.get('manifest_version')}"
+            )
+        self.name: str = manifest["schema_name"]
+        self.version: str = manifest["schema_version"]
+        self.tree_root: str = manifest["tree_root"]
+        self._types: list[str] = manifest["types"]
+        self._enums: dict[str, list[str]] = manifest["enums"]
+        self._ancestors: dict[str, list[str]] = {
+            cls_name: cls_def["ancestors"]
+            for cls_name, cls_def in manifest["classes"].items()
+        }
+        self._descendants: dict[str, list[str]] = {
+            cls_name: [
+                other
+                for other, ancestors in self._ancestors.items()
+                if cls_name in ancestors
+            ]
+            for cls_name in self._ancestors
+        }
+        self._slots: dict[str, dict[str, SlotInfo]] = {
+            cls_name: {slot["name"]: SlotInfo(**slot) for slot in cls_def["slots"]}
+            for cls_name, cls_def in manifest["classes"].items()
+        }
+        self._identifiers: dict[str, Optional[SlotInfo]] = {
+            cls_name: next((slot for slot in slots.values() if slot.identifier), None)
+            for cls_name, slots in self._slots.items()
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> "SchemaManifest":
+        """Loads the schema manifest from the given file"""
+        with open(path, "r", encoding="utf8") as file:
+            return cls(json.load(file))
+
+    def _check_class(self, cls_name: str):
+        """Raises a ValueError if the class does not exist"""
+        if cls_name not in self._slots:
+            raise ValueError(f"No such class: '{cls_name}'")
+
+    def all_classes(self) -> list[str]:
+        """Returns the names of all classes"""
+        return list(self._slots)
+
+    def all_enums(self) -> list[str]:
+        """Returns the names of all enums"""
+        return list(self._enums)
+
+    def all_types(self) -> list[str]:
+        """Returns the names of all types"""
+        return list(self._types)
+
+    def permissible_values(self, enum_name: str) -> list[str]:
+        """Returns the permissible values of an enum"""
+        if enum_name not in self._enums:
+            raise ValueError(f"No such enum: '{enum_name}'")
+        return list(self._enums[enum_name])
+
+    def class_ancestors(self, cls_name: str) -> list[str]:
+        """Returns the class itself and all classes and mixins it inherits from"""
+        self._check_class(cls_name)
+        return list(self._ancestors[cls_name])
+
+    def class_descendants(self, cls_name: str) -> list[str]:
+        """Returns the class itself and all classes inheriting from it"""
+        self._check_class(cls_name)
+        return list(self._descendants[cls_name])
+
+    def class_induced_slots(self, cls_name: str) -> list[SlotInfo]:
+        """Returns the slots of a class, including inherited ones"""
+        self._check_class(cls_name)
+        return list(self._slots[cls_name].values())
+
+    def induced_slot(self, slot_name: str, cls_name: str) -> SlotInfo:
+        """Returns a slot of a class"""
+        self._check_class(cls_name)
+        if slot_name not in self._slots[cls_name]:
+            raise ValueError(f"No such slot in class '{cls_name}': '{slot_name}'")
+        return self._slots[cls_name][slot_name]
+
+    def get_identifier_slot(self, cls_name: str) -> Optional[SlotInfo]:
+        """Returns the identifier slot of a class, if any"""
+        self._check_class(cls_name)
+        return self._identifiers[cls_name]
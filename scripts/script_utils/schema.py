@@ -0,0 +1,69 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Utilities to derive layouts from the GHGA metadata schema"""
+
+from linkml_runtime.linkml_model.meta import SlotDefinition
+from linkml_runtime.utils.schemaview import SchemaView
+
+
+def get_ghga_schema_version(schema: SchemaView) -> str:
+    """Returns the version of the GHGA metadata schema"""
+    schema_def = [
+        sdef
+        for sdef in schema.all_schema()
+        if sdef.name == "GHGA-Submission-Metadata-Schema"
+    ]
+    if len(schema_def) != 1 or schema_def[0].version is None:
+        raise RuntimeError("Unable to identify GHGA Model version.")
+    return schema_def[0].version
+
+
+def get_ordered_slots(
+    schema: SchemaView,
+    slot_order: list[str],
+    cls_name: str,
+    wb_classes: set[str],
+) -> list[SlotDefinition]:
+    """Given a class, generates a list of slots that must be rendered. Slots
+    that are listed in the slot_order config parameter are at the top of the
+    list in their respective order. Slots that are referencing other classes
+    which are not part of this workbook are omitted."""
+    slots = schema.class_induced_slots(cls_name)
+    slot_names = {slot.name: idx for idx, slot in enumerate(slots)}
+    ordered = [
+        slots[slot_names[slot_name]]
+        for slot_name in slot_order
+        if slot_name in slot_names
+    ]
+    unordered = [slot for slot in slots if slot.name not in slot_order]
+    all_slots = ordered + unordered
+    # We ignore slots which have a class range when the target class is not included in this workbook.
+    ignored_slots = [
+        slot
+        for slot in all_slots
+        if slot.range in schema.all_classes()
+        and slot.range not in wb_classes
+        and schema.get_identifier_slot(slot.range)
+    ]
+    # If one of those is mandatory, we raise an error
+    for ignored_slot in ignored_slots:
+        if ignored_slot.required:
+            raise RuntimeError(
+                f"Slot '{cls_name}.{ignored_slot.name}' is mandatory, but target class is not included in the workbook!"
+            )
+    slots = [slot for slot in all_slots if slot not in ignored_slots]
+    return slots
@@ -0,0 +1,185 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Utilities to reconcile the File entities of a submission with a staging area"""
+
+import hashlib
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from linkml_runtime.utils.schemaview import SchemaView
+from pydantic import BaseModel
+
+from script_utils.submission import EntityKey, iter_entities
+
+FILE_CLASS = "File"
+NAME_SLOT = "name"
+INCLUDED_SLOT = "included_in_submission"
+READ_CHUNK_SIZE = 8 * 1024**2
+
+
+class StagingIndex(NamedTuple):
+    """The paths of all files found in the staging area, indexed by file name,
+    and the directories that could not be read"""
+
+    files: dict[str, list[str]]
+    unreadable: list[str]
+
+
+class ReconciliationReport(BaseModel):
+    """The result of reconciling a submission with a staging area"""
+
+    missing: list[EntityKey] = []
+    unnamed: list[EntityKey] = []
+    unreadable: list[str] = []
+    extra: list[str] = []
+    duplicate_staged: dict[str, list[str]] = {}
+    duplicate_declared: dict[str, list[EntityKey]] = {}
+
+    @property
+    def ok(self) -> bool:
+        """Whether or not the staging area matches the submission"""
+        return not (
+            self.missing
+            or self.unnamed
+            or self.unreadable
+            or self.duplicate_staged
+            or self.duplicate_declared
+        )
+
+
+def get_file_slots(
+    schema: SchemaView, submission_slots: dict[str, str]
+) -> dict[str, str]:
+    """Returns the submission slots that contain File-derived entities"""
+    file_classes = set(schema.class_descendants(FILE_CLASS))
+    return {
+        slot_name: cls_name
+        for slot_name, cls_name in submission_slots.items()
+        if cls_name in file_classes
+    }
+
+
+def _scan_dir(path: str) -> tuple[list[str], list[str], Optional[str]]:
+    """Lists the regular files and subdirectories of a single directory. If the
+    directory cannot be read, the entries listed so far are returned together
+    with the error."""
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    files.append(entry.path)
+    except OSError as error:
+        return files, subdirs, f"{path}: {error.strerror or error}"
+    return files, subdirs, None
+
+
+def scan_staging_area(root: Path, workers: int) -> StagingIndex:
+    """Walks the staging area with parallel scandir workers and indexes all
+    files by their file name. Directories that cannot be read are skipped and
+    reported in the index."""
+    files: dict[str, list[str]] = defaultdict(list)
+    unreadable = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        level = [str(root)]
+        while level:
+            next_level = []
+            for dir_files, subdirs, error in executor.map(_scan_dir, level):
+                for path in dir_files:
+                    files[os.path.basename(path)].append(path)
+                next_level.extend(subdirs)
+                if error:
+                    unreadable.append(error)
+            level = next_level
+    return StagingIndex(files=files, unreadable=sorted(unreadable))
+
+
+def compute_checksum(path: str, algorithm: str) -> str:
+    """Computes the checksum of a file using large sequential reads"""
+    digest = hashlib.new(algorithm)
+    buffer = bytearray(READ_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as file:
+        while size := file.readinto(buffer):
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+def _get_file_info(path: str, sizes: bool, algorithm: Optional[str]) -> dict[str, Any]:
+    """Collects the size and/or the checksum of a single file"""
+    info: dict[str, Any] = {}
+    try:
+        if sizes:
+            info["size"] = os.stat(path).st_size
+        if algorithm:
+            info[algorithm] = compute_checksum(path, algorithm)
+    except OSError as error:
+        info["error"] = error.strerror or str(error)
+    return info
+
+
+def collect_file_info(
+    paths: list[str], sizes: bool, algorithm: Optional[str], workers: int
+) -> dict[str, dict[str, Any]]:
+    """Collects the sizes and/or checksums of the given files in a thread pool.
+    Files that cannot be read get an error entry instead."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        infos = executor.map(
+            lambda path: _get_file_info(path, sizes=sizes, algorithm=algorithm),
+            paths,
+        )
+        return dict(zip(paths, infos))
+
+
+def reconcile(
+    submission: dict[str, Any],
+    file_slots: dict[str, str],
+    index: StagingIndex,
+) -> ReconciliationReport:
+    """Matches the File entities of a submission against the staging index.
+    Raises a MissingAliasError for entities without alias."""
+    declared: dict[str, list[EntityKey]] = defaultdict(list)
+    report = ReconciliationReport(unreadable=index.unreadable)
+    for key, entity in iter_entities(submission, file_slots):
+        name = entity.get(NAME_SLOT)
+        if not isinstance(name, str):
+            report.unnamed.append(key)
+            continue
+        declared[name].append(key)
+        if entity.get(INCLUDED_SLOT) and name not in index.files:
+            report.missing.append(key)
+    report.extra = sorted(
+        path
+        for name, paths in index.files.items()
+        if name not in declared
+        for path in paths
+    )
+    report.duplicate_staged = {
+        name: sorted(paths)
+        for name, paths in index.files.items()
+        if len(paths) > 1 and name in declared
+    }
+    report.duplicate_declared = {
+        name: keys for name, keys in declared.items() if len(keys) > 1
+    }
+    return report
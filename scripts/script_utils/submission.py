@@ -0,0 +1,227 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Utilities to load submissions and to navigate the entities they contain"""
+
+import json
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Iterator, NamedTuple, Optional, Union
+
+import yaml
+
+from script_utils.manifest import SchemaManifest
+
+if TYPE_CHECKING:
+    from linkml_runtime.utils.schemaview import SchemaView
+
+SUBMISSION_CLASS = "Submission"
+ALIAS_SLOT = "alias"
+JSON_CHUNK_SIZE = 1024**2
+
+
+class EntityKey(NamedTuple):
+    """Identifies an entity of a submission by its class and its alias"""
+
+    class_name: str
+    alias: str
+
+
+class MissingAliasError(ValueError):
+    """Raised when an entity of a submission does not have a valid alias"""
+
+
+def load_submission(path: Path) -> dict[str, Any]:
+    """Loads a submission document from a JSON or YAML file"""
+    with open(path, "r", encoding="utf8") as file:
+        if path.suffix == ".json":
+            submission = json.load(file)
+        else:
+            submission = yaml.safe_load(file)
+    if not isinstance(submission, dict):
+        raise ValueError(f"File '{path}' does not contain a submission object.")
+    return submission
+
+
+class _JsonStream:
+    """Decodes a JSON document from a file one value at a time"""
+
+    def __init__(self, file: IO[str]):
+        """Creates a stream reading from the given text file"""
+        self.file = file
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Reads more data into the buffer. The read size grows with the
+        buffer, so that large values are decoded in amortized linear time."""
+        if self.eof:
+            return False
+        chunk = self.file.read(max(JSON_CHUNK_SIZE, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Returns the next non-whitespace character without consuming it, or
+        an empty string at the end of the file"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos : self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        """Consumes the next non-whitespace character, which must be one of the
+        given characters"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(
+                f"Expected one of {chars!r}", self.buffer, self.pos
+            )
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decodes the next complete value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number might continue in the next chunk, other values are
+            # delimited
+            truncated = (
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                and (end == len(self.buffer) or self.buffer[end] in "+-.eE")
+            )
+            if not truncated or not self._fill():
+                self.pos = end
+                return value
+
+
+def _iter_json_items(file: IO[str], path: Path) -> Iterator[tuple[str, Any]]:
+    """Iterates over the items of a JSON submission without loading it"""
+    stream = _JsonStream(file)
+    if stream.peek() != "{":
+        raise ValueError(f"File '{path}' does not contain a submission object.")
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        slot_name = stream.value()
+        stream.expect(":")
+        if stream.peek() == "[":
+            stream.expect("[")
+            if stream.peek() == "]":
+                stream.expect("]")
+            else:
+                while True:
+                    yield slot_name, stream.value()
+                    if stream.expect(",]") == "]":
+                        break
+        else:
+            yield slot_name, stream.value()
+        if stream.expect(",}") == "}":
+            return
+
+
+def iter_submission_items(path: Path) -> Iterator[tuple[str, Any]]:
+    """Iterates over a submission file and yields the items of all top-level
+    slots one by one, together with the slot name. Values of slots that are
+    not lists are yielded as they are.
+
+    JSON files are decoded incrementally, so that only a single item is held in
+    memory at a time. YAML files cannot be streamed and are loaded as a whole."""
+    if path.suffix != ".json":
+        for slot_name, value in load_submission(path).items():
+            for item in value if isinstance(value, list) else [value]:
+                yield slot_name, item
+        return
+    with open(path, "r", encoding="utf8") as file:
+        yield from _iter_json_items(file, path)
+
+
+def get_alias(entity: Any) -> Optional[str]:
+    """Returns the alias of an entity, or None if it does not have a valid
+    alias"""
+    alias = entity.get(ALIAS_SLOT) if isinstance(entity, dict) else None
+    return alias if isinstance(alias, str) else None
+
+
+def get_submission_slots(schema: Union["SchemaView", SchemaManifest]) -> dict[str, str]:
+    """Returns a mapping from the slots of the Submission class to the names of
+    the classes whose entities they contain. Works with both a SchemaView and
+    a SchemaManifest."""
+    return {
+        slot.name: str(slot.range)
+        for slot in schema.class_induced_slots(SUBMISSION_CLASS)
+        if slot.range in schema.all_classes() and schema.get_identifier_slot(slot.range)
+    }
+
+
+def get_reference_slots(
+    schema: Union["SchemaView", SchemaManifest]
+) -> dict[str, dict[str, str]]:
+    """Returns, for every class contained in a submission, a mapping from the
+    slots that reference other entities by alias to the referenced class.
+    Works with both a SchemaView and a SchemaManifest."""
+    return {
+        cls_name: {
+            slot.name: str(slot.range)
+            for slot in schema.class_induced_slots(cls_name)
+            if slot.range in schema.all_classes()
+            and not slot.inlined
+            and schema.get_identifier_slot(slot.range)
+        }
+        for cls_name in get_submission_slots(schema).values()
+    }
+
+
+def iter_entities(
+    submission: dict[str, Any], submission_slots: dict[str, str]
+) -> Iterator[tuple[EntityKey, dict[str, Any]]]:
+    """Iterates over all entities of a submission and yields them together
+    with their key. Raises a MissingAliasError for entities without alias."""
+    for slot_name, cls_name in submission_slots.items():
+        for entity in submission.get(slot_name) or []:
+            alias = get_alias(entity)
+            if alias is None:
+                raise MissingAliasError(
+                    f"An entity of class {cls_name} in slot '{slot_name}' has no alias."
+                )
+            yield EntityKey(cls_name, alias), entity
+
+
+def iter_references(
+    key: EntityKey, entity: dict[str, Any], reference_slots: dict[str, dict[str, str]]
+) -> Iterator[tuple[str, EntityKey]]:
+    """Iterates over the entities referenced by the given entity and yields
+    them together with the name of the referencing slot."""
+    for slot_name, target_cls in reference_slots[key.class_name].items():
+        value = entity.get(slot_name)
+        if value is None:
+            continue
+        for alias in value if isinstance(value, list) else [value]:
+            yield slot_name, EntityKey(target_cls, alias)
@@ -0,0 +1,182 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Writers for flat, per-class tables of submission entities"""
+
+import csv
+import json
+import sys
+from array import array
+from pathlib import Path
+from typing import IO, Any, NamedTuple, Optional, Union
+
+from linkml_runtime.utils.schemaview import SchemaView
+
+from script_utils.schema import get_ordered_slots
+
+SOURCE_COLUMN = "submission"
+CODES_BYTE_ORDER = "little"
+
+
+class Column(NamedTuple):
+    """A column of a class table. Categorical columns, i.e. single-valued enum
+    slots, are dictionary-encoded by the columnar writer."""
+
+    name: str
+    multivalued: bool
+    categorical: bool
+
+
+def get_columns(
+    schema: SchemaView, slot_order: list[str], cls_name: str, wb_classes: set[str]
+) -> list[Column]:
+    """Derives the columns of a class table from the induced slots of the class"""
+    return [
+        Column(
+            name=slot.name,
+            multivalued=bool(slot.multivalued),
+            categorical=slot.range in schema.all_enums() and not slot.multivalued,
+        )
+        for slot in get_ordered_slots(
+            schema=schema,
+            slot_order=slot_order,
+            cls_name=cls_name,
+            wb_classes=wb_classes,
+        )
+    ]
+
+
+def encode_value(value: Any) -> Optional[str]:
+    """Encodes a slot value as a string. Multivalued slots and inlined objects,
+    such as attributes, are encoded as compact JSON. Other scalars, such as
+    dates loaded from YAML, are converted with str()."""
+    if value is None:
+        return None
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+class TsvTableWriter:
+    """Writes a class table as a TSV file with a header row"""
+
+    def __init__(self, path: Path, columns: list[Column]):
+        """Creates the file and writes the header row"""
+        self.columns = columns
+        # pylint: disable=consider-using-with
+        self._file = open(path, "w", encoding="utf8", newline="")
+        self._writer = csv.writer(self._file, dialect="excel-tab")
+        self._writer.writerow([SOURCE_COLUMN] + [column.name for column in columns])
+
+    def write(self, source: str, entities: list[dict[str, Any]]):
+        """Appends a chunk of entities to the table"""
+        self._writer.writerows(
+            [source]
+            + [encode_value(entity.get(column.name)) for column in self.columns]
+            for entity in entities
+        )
+
+    def close(self):
+        """Closes the file"""
+        self._file.close()
+
+
+class ColumnarTableWriter:
+    """Writes a class table as a directory with one file per column.
+
+    Categorical columns and the submission column are dictionary-encoded: the
+    values are stored as unsigned 32-bit little-endian integer codes in a
+    `<column>.codes` file, and the values the codes refer to are stored in
+    `<column>.dict.json`. Code 0 denotes a missing value. All other columns are
+    stored as JSON lines in a `<column>.jsonl` file. A `_layout.json` file lists
+    the columns, the number of rows and the byte order of the codes."""
+
+    def __init__(self, path: Path, columns: list[Column]):
+        """Creates the table directory and opens the column files"""
+        self.path = path
+        self.columns = [Column(SOURCE_COLUMN, False, True)] + columns
+        self.rows = 0
+        path.mkdir(parents=True, exist_ok=True)
+        self._dictionaries: dict[str, dict[str, int]] = {
+            column.name: {} for column in self.columns if column.categorical
+        }
+        # pylint: disable=consider-using-with
+        self._files: dict[str, IO] = {
+            column.name: (
+                open(path / f"{column.name}.codes", "wb")
+                if column.categorical
+                else open(path / f"{column.name}.jsonl", "w", encoding="utf8")
+            )
+            for column in self.columns
+        }
+
+    def _encode_codes(self, name: str, values: list[Any]) -> array:
+        """Dictionary-encodes the values of a categorical column"""
+        dictionary = self._dictionaries[name]
+        codes = array("I")
+        for value in values:
+            if value is None:
+                codes.append(0)
+            else:
+                codes.append(dictionary.setdefault(value, len(dictionary) + 1))
+        if sys.byteorder != CODES_BYTE_ORDER:
+            codes.byteswap()
+        return codes
+
+    def write(self, source: str, entities: list[dict[str, Any]]):
+        """Appends a chunk of entities to the table"""
+        for column in self.columns:
+            values: list[Any]
+            if column.name == SOURCE_COLUMN:
+                values = [source] * len(entities)
+            else:
+                values = [entity.get(column.name) for entity in entities]
+            file = self._files[column.name]
+            if column.categorical:
+                self._encode_codes(column.name, values).tofile(file)
+            else:
+                file.writelines(
+                    json.dumps(value, ensure_ascii=False, default=str) + "\n"
+                    for value in values
+                )
+        self.rows += len(entities)
+
+    def close(self):
+        """Closes all column files and writes the dictionaries and the layout"""
+        for file in self._files.values():
+            file.close()
+        for name, dictionary in self._dictionaries.items():
+            with open(self.path / f"{name}.dict.json", "w", encoding="utf8") as file:
+                json.dump(list(dictionary), file, indent=2)
+        with open(self.path / "_layout.json", "w", encoding="utf8") as file:
+            json.dump(
+                {
+                    "rows": self.rows,
+                    "byte_order": CODES_BYTE_ORDER,
+                    "columns": [column._asdict() for column in self.columns],
+                },
+                file,
+                indent=2,
+            )
+
+
+TableWriter = Union[TsvTableWriter, ColumnarTableWriter]
+TABLE_WRITERS: dict[str, type[TableWriter]] = {
+    "tsv": TsvTableWriter,
+    "columnar": ColumnarTableWriter,
+}
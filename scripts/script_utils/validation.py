@@ -0,0 +1,221 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""A validator for submissions that is compiled from the schema manifest"""
+
+from typing import Any, NamedTuple, Optional
+
+from script_utils.manifest import SchemaManifest
+from script_utils.submission import (
+    ALIAS_SLOT,
+    EntityKey,
+    get_reference_slots,
+    get_submission_slots,
+    iter_entities,
+    iter_references,
+)
+
+TYPE_CHECKS: dict[str, tuple[type, ...]] = {
+    "string": (str,),
+    "integer": (int,),
+    "boolean": (bool,),
+    "float": (int, float),
+    "double": (int, float),
+    "decimal": (int, float),
+}
+
+
+class Finding(NamedTuple):
+    """A problem found in a submission"""
+
+    class_name: str
+    alias: Optional[str]
+    slot_name: Optional[str]
+    message: str
+
+
+class SlotRule(NamedTuple):
+    """The checks that apply to the values of a slot of a particular class"""
+
+    name: str
+    multivalued: bool
+    required: bool
+    types: Optional[tuple[type, ...]]
+    permissible_values: Optional[frozenset[str]]
+    inlined_class: Optional[str]
+
+
+def _is_empty(value: Any) -> bool:
+    """Whether or not a value counts as missing"""
+    return value is None or value == "" or value == []
+
+
+class SubmissionValidator:
+    """Validates submissions against the schema manifest.
+
+    The rules for all classes are compiled once when the validator is created,
+    so that validating a submission only needs dictionary lookups."""
+
+    def __init__(self, manifest: SchemaManifest):
+        """Compiles the rules for all classes of the manifest"""
+        self.manifest = manifest
+        self.submission_slots = get_submission_slots(manifest)
+        self.reference_slots = get_reference_slots(manifest)
+        self.rules: dict[str, dict[str, SlotRule]] = {
+            cls_name: self._compile_class(cls_name)
+            for cls_name in manifest.all_classes()
+        }
+
+    def _compile_class(self, cls_name: str) -> dict[str, SlotRule]:
+        """Compiles the rules for the slots of a class"""
+        enums = set(self.manifest.all_enums())
+        classes = set(self.manifest.all_classes())
+        rules = {}
+        for slot in self.manifest.class_induced_slots(cls_name):
+            inlined_class = (
+                slot.range if slot.range in classes and slot.inlined else None
+            )
+            types: Optional[tuple[type, ...]]
+            if slot.range in classes:
+                # Inlined objects are checked separately, references are strings
+                types = (dict,) if inlined_class else (str,)
+            elif slot.range in enums:
+                types = (str,)
+            else:
+                types = TYPE_CHECKS.get(slot.range)
+            rules[slot.name] = SlotRule(
+                name=slot.name,
+                multivalued=slot.multivalued,
+                required=slot.required,
+                types=types,
+                permissible_values=(
+                    frozenset(self.manifest.permissible_values(slot.range))
+                    if slot.range in enums
+                    else None
+                ),
+                inlined_class=inlined_class,
+            )
+        return rules
+
+    def validate_object(
+        self,
+        cls_name: str,
+        alias: Optional[str],
+        obj: Any,
+        owner: Optional[str] = None,
+        path: str = "",
+    ) -> list[Finding]:
+        """Checks the slots of a single object against the rules of its class.
+        Findings for inlined objects are reported on the owning class, with the
+        path to the offending value as slot name, e.g. `attributes[0].key`."""
+        owner = owner or cls_name
+        if not isinstance(obj, dict):
+            return [Finding(owner, alias, path or None, "Expected an object.")]
+        prefix = f"{path}." if path else ""
+        rules = self.rules[cls_name]
+        findings = [
+            Finding(owner, alias, prefix + slot_name, "Unknown slot.")
+            for slot_name in obj
+            if slot_name not in rules
+        ]
+        for rule in rules.values():
+            slot_path = prefix + rule.name
+            value: Any = obj.get(rule.name)
+            if _is_empty(value):
+                if rule.required:
+                    findings.append(
+                        Finding(owner, alias, slot_path, "Missing required value.")
+                    )
+                continue
+            if rule.multivalued != isinstance(value, list):
+                expected = "a list" if rule.multivalued else "a single value"
+                findings.append(
+                    Finding(owner, alias, slot_path, f"Expected {expected}.")
+                )
+                continue
+            if not rule.multivalued:
+                findings.extend(self._check_value(owner, alias, rule, value, slot_path))
+                continue
+            for index, item in enumerate(value):
+                findings.extend(
+                    self._check_value(owner, alias, rule, item, f"{slot_path}[{index}]")
+                )
+        return findings
+
+    def _check_value(
+        self, owner: str, alias: Optional[str], rule: SlotRule, value: Any, path: str
+    ) -> list[Finding]:
+        """Checks a single value of a slot, found at the given path"""
+        if rule.types and (
+            not isinstance(value, rule.types)
+            or (isinstance(value, bool) and bool not in rule.types)
+        ):
+            return [Finding(owner, alias, path, f"Invalid value type: {value!r}.")]
+        if rule.permissible_values is not None and value not in rule.permissible_values:
+            return [Finding(owner, alias, path, f"Value not permissible: {value!r}.")]
+        if rule.inlined_class:
+            return self.validate_object(rule.inlined_class, alias, value, owner, path)
+        return []
+
+    def validate(self, submission: Any) -> list[Finding]:
+        """Validates a submission and returns all findings"""
+        tree_root = self.manifest.tree_root
+        if not isinstance(submission, dict):
+            return [Finding(tree_root, None, None, "Expected an object.")]
+        findings = [
+            Finding(tree_root, None, slot_name, "Unknown slot.")
+            for slot_name in submission
+            if slot_name not in self.submission_slots
+        ]
+        valid_entities: dict[str, list[dict[str, Any]]] = {}
+        for slot_name, cls_name in self.submission_slots.items():
+            entities = submission.get(slot_name) or []
+            if not entities and self.rules[tree_root][slot_name].required:
+                findings.append(
+                    Finding(tree_root, None, slot_name, "Missing required value.")
+                )
+            if not isinstance(entities, list):
+                findings.append(Finding(tree_root, None, slot_name, "Expected a list."))
+                entities = []
+            valid_entities[slot_name] = []
+            for entity in entities:
+                if isinstance(entity, dict) and isinstance(entity.get(ALIAS_SLOT), str):
+                    valid_entities[slot_name].append(entity)
+                else:
+                    findings.append(
+                        Finding(cls_name, None, ALIAS_SLOT, "Missing or invalid alias.")
+                    )
+        submission = valid_entities
+        keys: set[EntityKey] = set()
+        for key, entity in iter_entities(submission, self.submission_slots):
+            if key in keys:
+                findings.append(
+                    Finding(key.class_name, key.alias, ALIAS_SLOT, "Duplicate alias.")
+                )
+            keys.add(key)
+            findings.extend(self.validate_object(key.class_name, key.alias, entity))
+        for key, entity in iter_entities(submission, self.submission_slots):
+            for slot_name, target in iter_references(key, entity, self.reference_slots):
+                if isinstance(target.alias, str) and target not in keys:
+                    findings.append(
+                        Finding(
+                            key.class_name,
+                            key.alias,
+                            slot_name,
+                            f"Unknown {target.class_name} '{target.alias}'.",
+                        )
+                    )
+        return findings
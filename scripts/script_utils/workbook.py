@@ -0,0 +1,164 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Conversion of cell values between submissions and XLSX workbooks"""
+
+from typing import IO, Any
+
+from openpyxl import load_workbook
+
+from script_utils.manifest import SchemaManifest, SlotInfo
+from script_utils.submission import get_submission_slots
+
+HEADER_ROWS = 6
+MULTIVALUE_SEPARATOR = ";"
+KEY_VALUE_SEPARATOR = "="
+TYPE_SEPARATOR = "|"
+ATTRIBUTE_SLOTS = ("key", "key_type", "value", "value_type")
+
+
+def encode_attribute(attribute: dict[str, Any]) -> str:
+    """Encodes an inlined attribute as a key=value pair. The optional key and
+    value types are appended to the key and the value respectively, separated by
+    a vertical bar: `key|key_type=value|value_type`. Raises a ValueError if the
+    attribute could not be decoded again without loss."""
+    unknown = attribute.keys() - set(ATTRIBUTE_SLOTS)
+    if unknown:
+        raise ValueError(f"Cannot encode attribute slots {sorted(unknown)}.")
+    parts = {}
+    for slot_name in ATTRIBUTE_SLOTS:
+        part = "" if attribute.get(slot_name) is None else str(attribute[slot_name])
+        reserved = MULTIVALUE_SEPARATOR + TYPE_SEPARATOR
+        if slot_name in ("key", "key_type"):
+            reserved += KEY_VALUE_SEPARATOR
+        if any(char in part for char in reserved):
+            raise ValueError(
+                f"The attribute {slot_name} {part!r} contains one of the reserved"
+                + f" characters {reserved!r}."
+            )
+        parts[slot_name] = part
+    key, value = parts["key"], parts["value"]
+    if parts["key_type"]:
+        key += TYPE_SEPARATOR + parts["key_type"]
+    if parts["value_type"]:
+        value += TYPE_SEPARATOR + parts["value_type"]
+    return f"{key}{KEY_VALUE_SEPARATOR}{value}"
+
+
+def decode_attribute(text: str) -> dict[str, Any]:
+    """Decodes an inlined attribute, reversing encode_attribute"""
+    key, _, value = text.partition(KEY_VALUE_SEPARATOR)
+    key, _, key_type = key.partition(TYPE_SEPARATOR)
+    value, _, value_type = value.partition(TYPE_SEPARATOR)
+    parts = {"key": key, "key_type": key_type, "value": value, "value_type": value_type}
+    return {
+        slot_name: part.strip()
+        for slot_name, part in parts.items()
+        if part.strip() or slot_name in ("key", "value")
+    }
+
+
+def encode_cell_value(value: Any) -> Any:
+    """Encodes a slot value for a worksheet cell. The values of multivalued
+    slots are joined by the separator, inlined attributes are encoded with
+    encode_attribute. Raises a ValueError if a value of a multivalued slot
+    contains the separator."""
+    if isinstance(value, list):
+        items = [str(encode_cell_value(item)) for item in value]
+        for item in items:
+            if MULTIVALUE_SEPARATOR in item:
+                raise ValueError(
+                    f"The value {item!r} contains the reserved character"
+                    + f" {MULTIVALUE_SEPARATOR!r}."
+                )
+        return MULTIVALUE_SEPARATOR.join(items)
+    if isinstance(value, dict):
+        return encode_attribute(value)
+    return value
+
+
+def _decode_scalar(value: Any, slot: SlotInfo, inlined: bool) -> Any:
+    """Decodes a single value of a slot from its cell representation"""
+    if inlined:
+        return decode_attribute(str(value))
+    if slot.range == "boolean" and isinstance(value, str):
+        return {"true": True, "false": False}.get(value.strip().lower(), value)
+    if slot.range == "integer" and isinstance(value, str):
+        return int(value) if value.strip().lstrip("-").isdigit() else value
+    if slot.range not in ("boolean", "integer", "float", "double", "decimal"):
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+    return value
+
+
+def decode_cell_value(value: Any, slot: SlotInfo, inlined: bool = False) -> Any:
+    """Decodes the value of a worksheet cell, reversing encode_cell_value"""
+    if slot.multivalued:
+        items = (
+            str(value).split(MULTIVALUE_SEPARATOR)
+            if isinstance(value, str)
+            else [value]
+        )
+        return [
+            _decode_scalar(
+                item.strip() if isinstance(item, str) else item, slot, inlined
+            )
+            for item in items
+            if item != ""
+        ]
+    return _decode_scalar(value, slot, inlined)
+
+
+def read_workbook(file: IO[bytes], manifest: SchemaManifest) -> dict[str, Any]:
+    """Reads a submission from a workbook in the layout generated by
+    generate_xlsx.py. Sheets that do not correspond to a submission class are
+    ignored, as are empty rows."""
+    sheet_slots = {
+        cls_name: slot_name
+        for slot_name, cls_name in get_submission_slots(manifest).items()
+    }
+    classes = set(manifest.all_classes())
+    submission: dict[str, Any] = {}
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            if ws.title not in sheet_slots:
+                continue
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, ())
+            slots = [
+                manifest.induced_slot(name, ws.title) if name else None
+                for name in header
+            ]
+            entities = []
+            for row_idx, row in enumerate(rows, 2):
+                if row_idx <= HEADER_ROWS:
+                    continue
+                entity = {
+                    slot.name: decode_cell_value(
+                        value, slot, inlined=slot.inlined and slot.range in classes
+                    )
+                    for slot, value in zip(slots, row)
+                    if slot is not None and value is not None and value != ""
+                }
+                if entity:
+                    entities.append(entity)
+            submission[sheet_slots[ws.title]] = entities
+    finally:
+        wb.close()
+    return submission
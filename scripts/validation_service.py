@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""Script to run a local validation service for submissions.
+
+The service loads the schema manifest once at startup and compiles a validator
+in every worker process of a process pool. It accepts submissions as JSON or as
+XLSX workbooks via HTTP on localhost:
+
+- `POST /validate` validates the submission in the request body and streams the
+  findings back as JSON lines, followed by a summary line
+- `GET /metrics` reports request counts, throughput and latency percentiles
+- `GET /health` reports the schema version the service validates against
+
+Small requests that arrive concurrently are coalesced into batches, so that
+they are handed to the process pool together.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Optional
+
+import typer
+
+from script_utils.cli import echo_success, run
+from script_utils.manifest import SchemaManifest
+from script_utils.validation import Finding, SubmissionValidator
+from script_utils.workbook import read_workbook
+
+HERE = Path(__file__).parent.resolve()
+MANIFEST_PATH = HERE.parent / "src" / "schema" / "submission.manifest.json"
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+STREAM_CHUNK_SIZE = 100
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+}
+
+_VALIDATOR: Optional[SubmissionValidator] = None
+
+
+def _init_worker(manifest_path: Path):
+    """Compiles the validator once per worker process"""
+    global _VALIDATOR  # pylint: disable=global-statement
+    _VALIDATOR = SubmissionValidator(SchemaManifest.load(manifest_path))
+
+
+def _ping() -> bool:
+    """Does nothing, used to start the worker processes ahead of time"""
+    return _VALIDATOR is not None
+
+
+def validate_payload(content_type: str, body: bytes) -> list[dict[str, Any]]:
+    """Decodes and validates a single submission in a worker process"""
+    assert _VALIDATOR is not None
+    try:
+        if content_type == XLSX_CONTENT_TYPE:
+            submission = read_workbook(BytesIO(body), _VALIDATOR.manifest)
+        else:
+            submission = json.loads(body)
+    except Exception as err:  # pylint: disable=broad-except
+        finding = Finding(
+            _VALIDATOR.manifest.tree_root,
+            None,
+            None,
+            f"Unable to read submission: {err}",
+        )
+        return [finding._asdict()]
+    return [finding._asdict() for finding in _VALIDATOR.validate(submission)]
+
+
+def validate_batch(payloads: list[tuple[str, bytes]]) -> list[list[dict[str, Any]]]:
+    """Validates a batch of submissions in a worker process"""
+    return [validate_payload(content_type, body) for content_type, body in payloads]
+
+
+class ServiceMetrics:
+    """Request counts, throughput and latencies of the service"""
+
+    def __init__(self, window: int = 10_000):
+        """Creates empty metrics that keep the latencies of the most recent
+        requests"""
+        self.started = time.monotonic()
+        self.requests = 0
+        self.failures = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._finished: deque[float] = deque(maxlen=window)
+
+    def record_request(self, latency: float, failed: bool):
+        """Records a finished validation request"""
+        self.requests += 1
+        self.failures += failed
+        self._latencies.append(latency)
+        self._finished.append(time.monotonic())
+
+    def record_batch(self, size: int):
+        """Records a batch handed to the process pool"""
+        self.batches += 1
+        self.batched_requests += size
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns the current metrics"""
+        now = time.monotonic()
+        latencies = sorted(self._latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(fraction * len(latencies)))
+            return round(latencies[index] * 1000, 3)
+
+        uptime = now - self.started
+        return {
+            "uptime_s": round(uptime, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "throughput_rps": round(self.requests / uptime, 3) if uptime else 0.0,
+            "recent_throughput_rps": round(
+                sum(1 for finished in self._finished if now - finished <= 60) / 60, 3
+            ),
+            "latency_ms": {
+                "p50": percentile(0.5),
+                "p90": percentile(0.9),
+                "p99": percentile(0.99),
+                "max": percentile(1.0),
+            },
+            "batches": self.batches,
+            "mean_batch_size": (
+                round(self.batched_requests / self.batches, 3) if self.batches else None
+            ),
+        }
+
+
+class RequestBatcher:
+    """Coalesces concurrent small validation requests into batches for the
+    process pool. A batch is dispatched once it is full or once the first
+    request in it has waited for the maximum delay."""
+
+    def __init__(
+        self,
+        executor: ProcessPoolExecutor,
+        metrics: ServiceMetrics,
+        max_batch_size: int,
+        max_delay: float,
+        small_request_size: int,
+        max_pending_batches: int,
+    ):
+        """Creates a new batcher, which must be started with run()"""
+        self.executor = executor
+        self.metrics = metrics
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.small_request_size = small_request_size
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_pending_batches)
+        # Strong references to the dispatch tasks until they are done
+        self._tasks: set[asyncio.Task] = set()
+
+    async def validate(self, content_type: str, body: bytes) -> list[dict[str, Any]]:
+        """Validates a submission, as part of a batch if it is small"""
+        loop = asyncio.get_running_loop()
+        if len(body) > self.small_request_size:
+            async with self._slots:
+                self.metrics.record_batch(1)
+                results = await loop.run_in_executor(
+                    self.executor, validate_batch, [(content_type, body)]
+                )
+            return results[0]
+        future = loop.create_future()
+        await self._queue.put((content_type, body, future))
+        return await future
+
+    async def run(self):
+        """Collects queued requests into batches and dispatches them"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._slots.acquire()
+            task = loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list[tuple[str, bytes, asyncio.Future]]):
+        """Validates a batch in the process pool and resolves its requests.
+        Requests that were cancelled in the meantime are skipped."""
+        loop = asyncio.get_running_loop()
+        self.metrics.record_batch(len(batch))
+        try:
+            results = await loop.run_in_executor(
+                self.executor,
+                validate_batch,
+                [(content_type, body) for content_type, body, _ in batch],
+            )
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as err:  # pylint: disable=broad-except
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(err)
+        finally:
+            self._slots.release()
+
+
+class ValidationService:
+    """A minimal HTTP/1.1 server for the validation endpoints"""
+
+    def __init__(
+        self,
+        manifest: SchemaManifest,
+        batcher: RequestBatcher,
+        metrics: ServiceMetrics,
+        max_body_size: int,
+    ):
+        """Creates a new service"""
+        self.manifest = manifest
+        self.batcher = batcher
+        self.metrics = metrics
+        self.max_body_size = max_body_size
+
+    @staticmethod
+    def _head(status: int, headers: dict[str, str], keep_alive: bool) -> bytes:
+        """Encodes the status line and the headers of a response"""
+        headers = {**headers, "Connection": "keep-alive" if keep_alive else "close"}
+        lines = [f"HTTP/1.1 {status} {HTTP_REASONS[status]}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send_json(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        content: Any,
+        keep_alive: bool,
+    ):
+        """Sends a complete JSON response"""
+        body = json.dumps(content).encode("utf8")
+        writer.write(
+            self._head(
+                status,
+                {"Content-Type": "application/json", "Content-Length": str(len(body))},
+                keep_alive,
+            )
+            + body
+        )
+        await writer.drain()
+
+    async def _send_findings(
+        self,
+        writer: asyncio.StreamWriter,
+        findings: list[dict[str, Any]],
+        keep_alive: bool,
+    ):
+        """Streams findings as JSON lines using chunked transfer encoding"""
+        writer.write(
+            self._head(
+                200,
+                {
+                    "Content-Type": "application/x-ndjson",
+                    "Transfer-Encoding": "chunked",
+                },
+                keep_alive,
+            )
+        )
+        summary = {"valid": not findings, "findings": len(findings)}
+        for start in range(0, len(findings) + 1, STREAM_CHUNK_SIZE):
+            lines = [
+                json.dumps(finding)
+                for finding in findings[start : start + STREAM_CHUNK_SIZE]
+            ]
+            if start + STREAM_CHUNK_SIZE > len(findings):
+                lines.append(json.dumps(summary))
+            data = ("\n".join(lines) + "\n").encode("utf8")
+            writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _handle_validate(
+        self,
+        writer: asyncio.StreamWriter,
+        headers: dict[str, str],
+        body: bytes,
+        keep_alive: bool,
+    ):
+        """Handles a validation request"""
+        started = time.monotonic()
+        content_type = headers.get("content-type", "").split(";")[0].strip()
+        try:
+            findings = await self.batcher.validate(content_type, body)
+        except Exception as err:  # pylint: disable=broad-except
+            self.metrics.record_request(time.monotonic() - started, failed=True)
+            await self._send_json(writer, 500, {"detail": str(err)}, keep_alive)
+            return
+        self.metrics.record_request(time.monotonic() - started, failed=False)
+        await self._send_findings(writer, findings, keep_alive)
+
+    async def _route(
+        self,
+        writer: asyncio.StreamWriter,
+        method: str,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+        keep_alive: bool,
+    ):
+        """Dispatches a request to its endpoint"""
+        routes = {"/validate": "POST", "/metrics": "GET", "/health": "GET"}
+        if path not in routes:
+            await self._send_json(writer, 404, {"detail": "Not found."}, keep_alive)
+        elif method != routes[path]:
+            await self._send_json(
+                writer, 405, {"detail": "Method not allowed."}, keep_alive
+            )
+        elif path == "/validate":
+            await self._handle_validate(writer, headers, body, keep_alive)
+        elif path == "/metrics":
+            await self._send_json(writer, 200, self.metrics.snapshot(), keep_alive)
+        else:
+            await self._send_json(
+                writer,
+                200,
+                {"status": "ok", "schema_version": self.manifest.version},
+                keep_alive,
+            )
+
+    async def _read_body(
+        self, reader: asyncio.StreamReader, headers: dict[str, str]
+    ) -> Optional[bytes]:
+        """Reads the body of a request, which is either delimited by its
+        Content-Length or sent with chunked transfer encoding. Returns None if
+        the body exceeds the maximum size and raises a ValueError if it is
+        malformed."""
+        if "transfer-encoding" not in headers:
+            length = int(headers.get("content-length", 0))
+            if length > self.max_body_size:
+                return None
+            return await reader.readexactly(length)
+        chunks = []
+        size = 0
+        while True:
+            chunk_size = int((await reader.readline()).split(b";")[0], 16)
+            if chunk_size == 0:
+                break
+            size += chunk_size
+            if size > self.max_body_size:
+                return None
+            chunks.append(await reader.readexactly(chunk_size))
+            if await reader.readexactly(2) != b"\r\n":
+                raise ValueError("Malformed chunk.")
+        # Trailer fields are not used
+        while (await reader.readline()).strip():
+            pass
+        return b"".join(chunks)
+
+    async def _serve_requests(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Reads and answers requests until the connection is to be closed"""
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            method, target, version = request_line.decode("latin-1").split()
+            headers = {}
+            while (line := await reader.readline()).strip():
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = (
+                version == "HTTP/1.1"
+                and headers.get("connection", "").lower() != "close"
+            )
+            encoding = headers.get("transfer-encoding", "chunked").lower()
+            if encoding != "chunked":
+                await self._send_json(
+                    writer, 501, {"detail": "Unsupported transfer encoding."}, False
+                )
+                break
+            body = await self._read_body(reader, headers)
+            if body is None:
+                await self._send_json(
+                    writer, 413, {"detail": "Request too large."}, False
+                )
+                break
+            await self._route(
+                writer, method, target.split("?")[0], headers, body, keep_alive
+            )
+            if not keep_alive:
+                break
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Serves the requests of a single connection"""
+        try:
+            await self._serve_requests(reader, writer)
+        except ValueError:
+            # The peer might already be gone
+            with contextlib.suppress(ConnectionError):
+                await self._send_json(writer, 400, {"detail": "Bad request."}, False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(
+    host: str,
+    port: int,
+    workers: int,
+    max_batch_size: int,
+    max_delay: float,
+    small_request_size: int,
+    max_body_size: int,
+):
+    """Starts the process pool and serves requests until cancelled"""
+    manifest = SchemaManifest.load(MANIFEST_PATH)
+    metrics = ServiceMetrics()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(MANIFEST_PATH,)
+    ) as executor:
+        # Start all worker processes so that the first requests do not wait
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(executor, _ping) for _ in range(workers))
+        )
+        batcher = RequestBatcher(
+            executor=executor,
+            metrics=metrics,
+            max_batch_size=max_batch_size,
+            max_delay=max_delay,
+            small_request_size=small_request_size,
+            max_pending_batches=2 * workers,
+        )
+        service = ValidationService(
+            manifest=manifest,
+            batcher=batcher,
+            metrics=metrics,
+            max_body_size=max_body_size,
+        )
+        server = await asyncio.start_server(service.handle_connection, host, port)
+        batcher_task = loop.create_task(batcher.run())
+        echo_success(
+            f"Validating against schema version {manifest.version}"
+            + f" on http://{host}:{port} with {workers} worker(s)."
+        )
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher_task.cancel()
+
+
+def main(
+    host: str = typer.Option("127.0.0.1", help="The address to listen on."),
+    port: int = typer.Option(8080, help="The port to listen on."),
+    workers: int = typer.Option(
+        os.cpu_count() or 1, help="Number of validator processes."
+    ),
+    max_batch_size: int = typer.Option(32, help="Maximum requests per batch."),
+    max_delay_ms: float = typer.Option(
+        2.0, help="Maximum time a request waits for its batch to fill up."
+    ),
+    small_request_kib: int = typer.Option(
+        256, help="Requests up to this size in KiB are batched."
+    ),
+    max_body_mib: int = typer.Option(512, help="Maximum request size in MiB."),
+):
+    """Run the validation service."""
+    try:
+        asyncio.run(
+            serve(
+                host=host,
+                port=port,
+                workers=workers,
+                max_batch_size=max_batch_size,
+                max_delay=max_delay_ms / 1000,
+                small_request_size=small_request_kib * 1024,
+                max_body_size=max_body_mib * 1024**2,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    run(main)